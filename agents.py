@@ -2,11 +2,94 @@
 from __future__ import annotations
 
 import random
-from collections import deque
 from typing import Dict, List, Optional, Tuple
 
 import config
-from entities import Action, GameState, Position, Unit
+from entities import (
+    ATTACKS,
+    HARVEST,
+    IDLE,
+    MOVES,
+    PACIFY,
+    STABILIZE,
+    Action,
+    Base,
+    ControlPoint,
+    GameState,
+    Position,
+    ResourceTile,
+    Unit,
+)
+from grid import (
+    BASE_CELL_CLASS,
+    CELL_FREE,
+    build_cell_class,
+    build_flood_table,
+    build_neighbor_table,
+    flood_distances,
+    obstacle_mask_for,
+    static_cell_class,
+)
+
+
+class TurnIndex:
+    """Position lookups for one `choose_actions` call, built in a single pass over the state.
+
+    Cells are keyed by flat index (`y * width + x`) so lookups hash a small int instead of a
+    `Position`; convert back to `Position` only where the engine needs one.
+    """
+
+    def __init__(self, game_state: GameState):
+        width, height = game_state.width, game_state.height
+        self.width = width
+        obstacle_mask = getattr(game_state, "obstacle_mask", 0) or obstacle_mask_for(game_state.obstacles, width)
+        self.neighbors = build_neighbor_table(width, height, obstacle_mask)
+        self.flood_neighbors = build_flood_table(width, height, obstacle_mask)
+        self.units_by_pos: Dict[int, Unit] = {}
+        self.occupied = bytearray(width * height)  # 1 where a living unit stands
+        self.base_by_pos: Dict[int, Base] = {}
+        self.res_by_pos: Dict[int, ResourceTile] = {}
+        self.cp_by_pos: Dict[int, ControlPoint] = {}
+        # Coordinates packed alongside their objects for the nearest-target scans
+        self.res_xy: List[Tuple[int, int, ResourceTile]] = []
+        self.cp_xy: List[Tuple[int, int, ControlPoint]] = []
+        # Living unit coordinates per owner, for proximity checks against the other side
+        self.unit_xy_by_owner: Dict[str, List[Tuple[int, int]]] = {}
+        for player in game_state.players.values():
+            base = player.base
+            self.base_by_pos[base.position.y * width + base.position.x] = base
+            unit_xy = self.unit_xy_by_owner.setdefault(player.name, [])
+            for unit in player.units.values():
+                if unit.is_alive():
+                    x, y = unit.position.x, unit.position.y
+                    idx = y * width + x
+                    # Spawns can stack units on one cell; keep the first, as a linear scan would
+                    self.units_by_pos.setdefault(idx, unit)
+                    self.occupied[idx] = 1
+                    unit_xy.append((x, y))
+        # Same table with base cells treated as walls; bases never move, so both stay cached
+        base_mask = obstacle_mask_for((base.position for base in self.base_by_pos.values()), width)
+        self.neighbors_no_bases = build_neighbor_table(width, height, obstacle_mask | base_mask)
+        cell_class = getattr(game_state, "cell_class", None)
+        if cell_class is None:
+            static_cells = static_cell_class(width, height, obstacle_mask, self.base_by_pos.values())
+            cell_class = build_cell_class(static_cells, width, game_state.players.values())
+        self.cell_class = cell_class
+        for res in game_state.resources:
+            x, y = res.position.x, res.position.y
+            self.res_by_pos[y * width + x] = res
+            self.res_xy.append((x, y, res))
+        for cp in getattr(game_state, "control_points", []):
+            x, y = cp.position.x, cp.position.y
+            self.cp_by_pos[y * width + x] = cp
+            self.cp_xy.append((x, y, cp))
+
+    def cell(self, pos: Position) -> int:
+        return pos.y * self.width + pos.x
+
+    def live_base_at(self, idx: int) -> Optional[Base]:
+        base = self.base_by_pos.get(idx)
+        return base if base is not None and base.hp > 0 else None
 
 
 class Agent:
@@ -14,67 +97,84 @@ class Agent:
         raise NotImplementedError
 
 
-class RandomAgent(Agent):
+class ParallelAgent(Agent):
+    """Agent whose `choose_actions` plans every living unit on the board, both sides at once.
+
+    With `GameEngine(..., simultaneous=True)` one instance seated as both Blue and Red is asked once
+    per turn, and the engine hands each side its own units' actions from the joint dict.
+    """
+
+
+class RandomAgent(ParallelAgent):
     """Uniformly random valid actions for each unit."""
 
     def __init__(self, seed: Optional[int] = None):
         self.random = random.Random(seed)
 
     def choose_actions(self, game_state: GameState) -> Dict[str, Action]:
-        actions: Dict[str, Action] = {}
         carry_limit = getattr(game_state, "carry_limit", config.UNIT_CARRY_LIMIT)
         mode = getattr(game_state, "mode", "classic")
-        control_points = getattr(game_state, "control_points", [])
-        occupied = _occupied_positions(game_state)
+        index = TurnIndex(game_state)
+        uids: List[str] = []
+        choice_lists: List[List[Action]] = []
         for player in game_state.players.values():
             for unit in player.units.values():
                 if not unit.is_alive():
                     continue
-                action_choices: List[Action] = [Action("idle")]
-                # Harvest if on resource
-                if game_state.resources:
-                    if any(res.position == unit.position for res in game_state.resources) and unit.cargo_count() < carry_limit:
-                        action_choices.append(Action("harvest"))
-                cp_here = _control_point_at(unit.position, control_points)
-                if mode != "classic" and cp_here:
-                    action_choices.append(Action("stabilize"))
-                    if cp_here.controller in (None, unit.owner):
-                        action_choices.append(Action("pacify"))
-                # Attack if adjacent
-                for npos, delta in _adjacent_positions(unit.position, game_state, occupied):
-                    target_unit = _unit_at_position(game_state, npos)
-                    target_base = _base_at_position(game_state, npos)
-                    if target_unit and target_unit.owner != unit.owner:
-                        action_choices.append(Action("attack", delta))
-                    if target_base and target_base.owner != unit.owner:
-                        action_choices.append(Action("attack", delta))
-                # Moves
-                for npos, delta in _adjacent_positions(unit.position, game_state, occupied, include_bases=True):
-                    if _is_cell_free(game_state, npos, occupied, unit.owner):
-                        action_choices.append(Action("move", delta))
-                actions[unit.uid] = self.random.choice(action_choices)
-        return actions
-
-
-class HeuristicAgent(Agent):
+                uids.append(unit.uid)
+                choice_lists.append(self._action_choices(unit, index, carry_limit, mode))
+        # Draw every unit's pick in one pass; the RNG sequence matches one choice() per unit in order.
+        choose = self.random.choice
+        return {uid: choose(choices) for uid, choices in zip(uids, choice_lists)}
+
+    def _action_choices(self, unit: Unit, index: TurnIndex, carry_limit: int, mode: str) -> List[Action]:
+        action_choices: List[Action] = [IDLE]
+        # Harvest if on resource
+        here = index.cell(unit.position)
+        if here in index.res_by_pos and unit.cargo_count() < carry_limit:
+            action_choices.append(HARVEST)
+        cp_here = index.cp_by_pos.get(here)
+        if mode != "classic" and cp_here:
+            action_choices.append(STABILIZE)
+            if cp_here.controller in (None, unit.owner):
+                action_choices.append(PACIFY)
+        # Attack if adjacent
+        for nidx, delta in index.neighbors_no_bases[here]:
+            target_unit = index.units_by_pos.get(nidx)
+            target_base = index.live_base_at(nidx)
+            if target_unit and target_unit.owner != unit.owner:
+                action_choices.append(ATTACKS[delta])
+            if target_base and target_base.owner != unit.owner:
+                action_choices.append(ATTACKS[delta])
+        # Moves
+        for nidx, delta in index.neighbors[here]:
+            if _is_cell_free(nidx, index, unit.owner):
+                action_choices.append(MOVES[delta])
+        return action_choices
+
+
+class HeuristicAgent(ParallelAgent):
     """Simple rule-based agent with greedy objectives."""
 
     def __init__(self, seed: Optional[int] = None):
         self.random = random.Random(seed)
+        # Distance maps keyed by goal cell; only valid for the turn they were built in.
+        self._bfs_cache: Dict[int, List[int]] = {}
 
     def choose_actions(self, game_state: GameState) -> Dict[str, Action]:
-        occupied = _occupied_positions(game_state)
+        index = TurnIndex(game_state)
+        self._bfs_cache = {}
         actions: Dict[str, Action] = {}
         for player in game_state.players.values():
             for unit in player.units.values():
                 if not unit.is_alive():
                     continue
-                action = self._decide_for_unit(unit, game_state, occupied)
+                action = self._decide_for_unit(unit, game_state, index)
                 if action:
                     actions[unit.uid] = action
         return actions
 
-    def _decide_for_unit(self, unit: Unit, game_state: GameState, occupied: Dict[Tuple[int, int], str]) -> Optional[Action]:
+    def _decide_for_unit(self, unit: Unit, game_state: GameState, index: TurnIndex) -> Optional[Action]:
         my_base = game_state.players[unit.owner].base.position
         enemy_name = "Red" if unit.owner == "Blue" else "Blue"
         enemy_base = game_state.players[enemy_name].base.position
@@ -85,126 +185,116 @@ class HeuristicAgent(Agent):
         low_hp_threshold = 4 if mode == "classic" else 5
 
         # Attack adjacent threats/opportunities
-        enemy_adjacent = self._adjacent_enemies(unit, game_state)
+        enemy_adjacent = self._adjacent_enemies(unit, index)
         if enemy_adjacent:
             # Prefer weakest adjacent target
             target = min(enemy_adjacent, key=lambda t: t.hp if isinstance(t, Unit) else 999)
             delta = _direction_from_to(unit.position, target.position)
-            return Action("attack", delta)
+            return ATTACKS[delta]
 
         if mode != "classic" and control_points:
-            cp_here = _control_point_at(unit.position, control_points)
+            cp_here = index.cp_by_pos.get(index.cell(unit.position))
             if cp_here:
                 if cp_here.controller != unit.owner:
-                    return Action("stabilize")
+                    return STABILIZE
                 if cp_here.controller == unit.owner and cp_here.stability < capture_threshold:
-                    return Action("stabilize")
-                if cp_here.controller == unit.owner and cp_here.peace_turns == 0 and self._enemy_within(unit, game_state, radius=1):
-                    return Action("pacify")
+                    return STABILIZE
+                if cp_here.controller == unit.owner and cp_here.peace_turns == 0 and self._enemy_within(unit, index, radius=1):
+                    return PACIFY
 
         # Harvest if standing on resource and have space
-        if any(res.position == unit.position for res in game_state.resources) and unit.cargo_count() < carry_limit:
-            return Action("harvest")
+        if index.cell(unit.position) in index.res_by_pos and unit.cargo_count() < carry_limit:
+            return HARVEST
 
         # Return to base if carrying loot
         if unit.cargo_count() > 0:
-            step = self._step_toward(unit.position, my_base, game_state, occupied)
+            step = self._step_toward(unit.position, my_base, index)
             if step:
-                return Action("move", step)
-            return Action("idle")
+                return MOVES[step]
+            return IDLE
 
         # Retreat if low hp and enemy nearby
-        if unit.hp <= low_hp_threshold and self._enemy_within(unit, game_state, radius=2):
-            step = self._step_toward(unit.position, my_base, game_state, occupied)
-            return Action("move", step) if step else Action("idle")
+        if unit.hp <= low_hp_threshold and self._enemy_within(unit, index, radius=2):
+            step = self._step_toward(unit.position, my_base, index)
+            return MOVES[step] if step else IDLE
 
         if mode != "classic" and control_points:
-            target_cp = self._target_control_point(unit, control_points, capture_threshold)
+            target_cp = self._target_control_point(unit, index, capture_threshold)
             if target_cp:
-                step = self._step_toward(unit.position, target_cp.position, game_state, occupied)
-                return Action("move", step) if step else Action("idle")
+                step = self._step_toward(unit.position, target_cp.position, index)
+                return MOVES[step] if step else IDLE
 
         # Move toward nearest resource, else enemy base
-        target_res = self._nearest_resource(unit, game_state)
+        target_res = self._nearest_resource(unit, index)
         goal = target_res.position if target_res else enemy_base
-        step = self._step_toward(unit.position, goal, game_state, occupied)
-        return Action("move", step) if step else Action("idle")
-
-    def _nearest_resource(self, unit: Unit, game_state: GameState):
-        if not game_state.resources:
-            return None
-        return min(game_state.resources, key=lambda r: unit.position.manhattan_distance(r.position))
-
-    def _target_control_point(self, unit: Unit, control_points, capture_threshold: int):
-        if not control_points:
-            return None
-        candidates = []
-        for cp in control_points:
+        step = self._step_toward(unit.position, goal, index)
+        return MOVES[step] if step else IDLE
+
+    def _nearest_resource(self, unit: Unit, index: TurnIndex):
+        ux, uy = unit.position.x, unit.position.y
+        best = None
+        best_dist = None
+        for x, y, res in index.res_xy:
+            d = abs(x - ux) + abs(y - uy)
+            if best_dist is None or d < best_dist:
+                best, best_dist = res, d
+        return best
+
+    def _target_control_point(self, unit: Unit, index: TurnIndex, capture_threshold: int):
+        ux, uy = unit.position.x, unit.position.y
+        best = None
+        best_dist = None
+        for x, y, cp in index.cp_xy:
             if cp.controller == unit.owner and cp.stability >= capture_threshold:
                 continue
-            candidates.append(cp)
-        if not candidates:
-            return None
-        return min(candidates, key=lambda cp: unit.position.manhattan_distance(cp.position))
-
-    def _enemy_within(self, unit: Unit, game_state: GameState, radius: int) -> bool:
-        for player in game_state.players.values():
-            if player.name == unit.owner:
+            d = abs(x - ux) + abs(y - uy)
+            if best_dist is None or d < best_dist:
+                best, best_dist = cp, d
+        return best
+
+    def _enemy_within(self, unit: Unit, index: TurnIndex, radius: int) -> bool:
+        ux, uy = unit.position.x, unit.position.y
+        for owner, unit_xy in index.unit_xy_by_owner.items():
+            if owner == unit.owner:
                 continue
-            for enemy in player.units.values():
-                if enemy.is_alive() and unit.position.manhattan_distance(enemy.position) <= radius:
+            for x, y in unit_xy:
+                if abs(x - ux) + abs(y - uy) <= radius:
                     return True
         return False
 
-    def _adjacent_enemies(self, unit: Unit, game_state: GameState):
+    def _adjacent_enemies(self, unit: Unit, index: TurnIndex):
         enemies = []
-        for npos, _ in _adjacent_positions(unit.position, game_state, _occupied_positions(game_state), include_bases=True):
-            enemy_unit = _unit_at_position(game_state, npos)
-            enemy_base = _base_at_position(game_state, npos)
+        for nidx, _ in index.neighbors[index.cell(unit.position)]:
+            enemy_unit = index.units_by_pos.get(nidx)
+            enemy_base = index.live_base_at(nidx)
             if enemy_unit and enemy_unit.owner != unit.owner:
                 enemies.append(enemy_unit)
             if enemy_base and enemy_base.owner != unit.owner:
                 enemies.append(enemy_base)
         return enemies
 
-    def _step_toward(
-        self, start: Position, goal: Position, game_state: GameState, occupied: Dict[Tuple[int, int], str]
-    ) -> Optional[Tuple[int, int]]:
+    def _step_toward(self, start: Position, goal: Position, index: TurnIndex) -> Optional[Tuple[int, int]]:
         if start == goal:
             return None
-        path = _bfs_path(start, goal, game_state, occupied)
-        if len(path) >= 2:
-            return _direction_from_to(path[0], path[1])
-        return None
-
-
-def _occupied_positions(game_state: GameState) -> Dict[Tuple[int, int], str]:
-    occ: Dict[Tuple[int, int], str] = {}
-    for player in game_state.players.values():
-        for unit in player.units.values():
-            if unit.is_alive():
-                occ[(unit.position.x, unit.position.y)] = unit.owner
-    return occ
-
-
-def _is_cell_free(game_state: GameState, pos: Position, occupied: Dict[Tuple[int, int], str], owner: str) -> bool:
-    if not (0 <= pos.x < game_state.width and 0 <= pos.y < game_state.height):
-        return False
-    if pos in game_state.obstacles:
-        return False
-    if (pos.x, pos.y) in occupied:
-        return False
-    for player in game_state.players.values():
-        if player.base.position == pos and player.name != owner:
-            return False
-    return True
-
-
-def _control_point_at(pos: Position, control_points):
-    for cp in control_points:
-        if cp.position == pos:
-            return cp
-    return None
+        goal_idx = index.cell(goal)
+        dist = self._bfs_cache.get(goal_idx)
+        if dist is None:
+            dist = flood_distances(index.flood_neighbors, index.occupied, goal_idx)
+            self._bfs_cache[goal_idx] = dist
+        # First neighbor (in delta order) closest to the goal, same step a forward BFS would take.
+        best_step = None
+        best_dist = None
+        for nidx, delta in index.neighbors[index.cell(start)]:
+            d = dist[nidx]
+            if d >= 0 and (best_dist is None or d < best_dist):
+                best_step, best_dist = delta, d
+        return best_step
+
+
+def _is_cell_free(idx: int, index: TurnIndex, owner: str) -> bool:
+    # Free, or our own unoccupied base (a unit standing on it overrides the base class)
+    cell = index.cell_class[idx]
+    return cell == CELL_FREE or cell == BASE_CELL_CLASS.get(owner)
 
 
 def _mode_param(game_state: GameState, key: str, default: int) -> int:
@@ -212,72 +302,8 @@ def _mode_param(game_state: GameState, key: str, default: int) -> int:
     return params.get(key, default)
 
 
-def _adjacent_positions(
-    pos: Position, game_state: GameState, occupied: Dict[Tuple[int, int], str], include_bases: bool = False
-):
-    deltas = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-    for dx, dy in deltas:
-        np = Position(pos.x + dx, pos.y + dy)
-        if not (0 <= np.x < game_state.width and 0 <= np.y < game_state.height):
-            continue
-        if np in game_state.obstacles:
-            continue
-        if not include_bases and any(player.base.position == np for player in game_state.players.values()):
-            continue
-        yield np, (dx, dy)
-
-
 def _direction_from_to(src: Position, dst: Position) -> Tuple[int, int]:
     dx = dst.x - src.x
     dy = dst.y - src.y
     return (0 if dx == 0 else (1 if dx > 0 else -1), 0 if dy == 0 else (1 if dy > 0 else -1))
 
-
-def _bfs_path(
-    start: Position, goal: Position, game_state: GameState, occupied: Dict[Tuple[int, int], str]
-) -> List[Position]:
-    queue = deque()
-    queue.append(start)
-    parents: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {(start.x, start.y): None}
-
-    while queue:
-        current = queue.popleft()
-        if current == goal:
-            break
-        for npos, _ in _adjacent_positions(current, game_state, occupied, include_bases=True):
-            key = (npos.x, npos.y)
-            if key in parents:
-                continue
-            if npos in game_state.obstacles:
-                continue
-            # Allow stepping on goal even if occupied by base
-            if (npos.x, npos.y) in occupied and npos != goal:
-                continue
-            parents[key] = (current.x, current.y)
-            queue.append(npos)
-
-    if (goal.x, goal.y) not in parents:
-        return [start]
-    # Reconstruct path
-    path = [goal]
-    cur = (goal.x, goal.y)
-    while parents[cur] is not None:
-        cur = parents[cur]
-        path.append(Position(cur[0], cur[1]))
-    path.reverse()
-    return path
-
-
-def _unit_at_position(game_state: GameState, pos: Position) -> Optional[Unit]:
-    for player in game_state.players.values():
-        for unit in player.units.values():
-            if unit.is_alive() and unit.position == pos:
-                return unit
-    return None
-
-
-def _base_at_position(game_state: GameState, pos: Position):
-    for player in game_state.players.values():
-        if player.base.position == pos and player.base.hp > 0:
-            return player.base
-    return None
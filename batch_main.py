@@ -0,0 +1,54 @@
+"""CLI for playing many headless ArenAI Grid matches in parallel and summarising the results."""
+from __future__ import annotations
+
+import argparse
+import time
+
+from game_modes import DEFAULT_MODE, GAME_MODES
+from main import AGENT_REGISTRY
+from runner import run_games
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Play a batch of ArenAI Grid matches across worker processes.")
+    parser.add_argument("--games", type=int, default=100, help="Number of matches to play (default: 100)")
+    parser.add_argument("--mode", choices=GAME_MODES.keys(), default=DEFAULT_MODE, help="Game mode to run (default: world)")
+    parser.add_argument("--blue", choices=AGENT_REGISTRY.keys(), default="heuristic", help="Agent for Blue")
+    parser.add_argument("--red", choices=AGENT_REGISTRY.keys(), default="random", help="Agent for Red")
+    parser.add_argument("--seed-start", type=int, default=0, help="Seed of the first match; later ones count up")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 plays inline)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    seeds = range(args.seed_start, args.seed_start + args.games)
+    start = time.time()
+    # Whole matches are the unit of work: each worker builds fresh agents and engine per seed
+    results = run_games(
+        args.games,
+        AGENT_REGISTRY[args.blue],
+        AGENT_REGISTRY[args.red],
+        seeds=seeds,
+        mode_key=args.mode,
+        max_workers=args.workers,
+        trusted_agent=True,  # the registry agents only read their state
+    )
+    elapsed = time.time() - start
+    if not results:
+        print("No matches played.")
+        return
+
+    count = len(results)
+    blue_wins = sum(1 for r in results if r.winner == "Blue")
+    print(f"Played {count} matches ({args.blue} vs {args.red}, mode {args.mode}) in {elapsed:.2f}s")
+    print(f"Wins -> Blue: {blue_wins} | Red: {count - blue_wins}")
+    print(
+        f"Average score -> Blue: {sum(r.blue_score for r in results) / count:.1f} | "
+        f"Red: {sum(r.red_score for r in results) / count:.1f}"
+    )
+    print(f"Average turns: {sum(r.turns for r in results) / count:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,32 @@
 """Core entities and data structures for ArenAI Grid."""
 from __future__ import annotations
 
+from collections import abc
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
 
+# Unit cargo is packed into one int: lane i (8 bits wide) counts the mode's i-th resource type.
+CARGO_LANE_BITS = 8
+CARGO_LANE_MASK = (1 << CARGO_LANE_BITS) - 1
+
+
+def cargo_lane(carrying: int, lane: int) -> int:
+    return (carrying >> (lane * CARGO_LANE_BITS)) & CARGO_LANE_MASK
+
+
+def cargo_to_dict(carrying: int, resource_types: Sequence[str]) -> Dict[str, int]:
+    """Unpack a cargo int into `{rtype: count}` for the types actually carried."""
+    cargo: Dict[str, int] = {}
+    for lane, rtype in enumerate(resource_types):
+        count = cargo_lane(carrying, lane)
+        if count:
+            cargo[rtype] = count
+    return cargo
+
+
+class Position(NamedTuple):
+    """Board cell; a plain tuple, so it compares and hashes like `(x, y)`."""
 
-@dataclass(frozen=True)
-class Position:
     x: int
     y: int
 
@@ -23,13 +43,13 @@ class Position:
         return abs(self.x - other.x) + abs(self.y - other.y)
 
 
-@dataclass
+@dataclass(slots=True)
 class ResourceTile:
     rtype: str
     position: Position
 
 
-@dataclass
+@dataclass(slots=True)
 class ControlPoint:
     cid: int
     position: Position
@@ -38,59 +58,146 @@ class ControlPoint:
     peace_turns: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Base:
     owner: str  # "Blue" or "Red"
     hp: int
     position: Position
 
 
-@dataclass
+@dataclass(slots=True)
 class Unit:
     uid: str
     owner: str
     hp: int
     attack: int
     position: Position
-    carrying: Dict[str, int] = field(default_factory=dict)
+    carrying: int = 0  # packed per-type counts, see CARGO_LANE_BITS
+    death_logged: bool = False  # set by the engine once this unit's death has been reported
 
     def is_alive(self) -> bool:
         return self.hp > 0
 
     def cargo_count(self) -> int:
-        return sum(self.carrying.values())
+        total = 0
+        c = self.carrying
+        while c:
+            total += c & CARGO_LANE_MASK
+            c >>= CARGO_LANE_BITS
+        return total
+
+    def add_cargo(self, lane: int) -> None:
+        self.carrying += 1 << (lane * CARGO_LANE_BITS)
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayerState:
     name: str
     base: Base
     units: Dict[str, Unit]  # keyed by unit id
     score: int = 0
+    # Aggregates over living units; the engine keeps them current as its units take damage
+    alive_count: int = field(default=0, init=False)
+    alive_hp_total: int = field(default=0, init=False)
+    _living: Optional[List[Unit]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.refresh_units()
+
+    def refresh_units(self) -> None:
+        """Recompute the living-unit cache and aggregates from `units`."""
+        living = [u for u in self.units.values() if u.is_alive()]
+        self._living = living
+        self.alive_count = len(living)
+        self.alive_hp_total = sum(u.hp for u in living)
+
+    def mark_unit_lost(self, hp_lost: int) -> None:
+        """Drop a unit that just died from the aggregates; `hp_lost` is its hp before the hit."""
+        self.alive_count -= 1
+        self.alive_hp_total -= hp_lost
+        self._living = None
 
     def living_units(self) -> List[Unit]:
-        return [u for u in self.units.values() if u.is_alive()]
+        # Cached until a unit dies; callers must not mutate the returned list.
+        if self._living is None:
+            self._living = [u for u in self.units.values() if u.is_alive()]
+        return self._living
+
+
+class PlayersView(abc.Mapping):
+    """Read-only mapping over the engine's `players` dict, handed out without copying.
+
+    Unlike `types.MappingProxyType` it pickles and deep-copies, both as a plain detached dict, so
+    agents can still `copy.deepcopy(game_state)` for lookahead and engines can be checkpointed.
+    """
+
+    __slots__ = ("_players",)
+
+    def __init__(self, players: Dict[str, PlayerState]):
+        self._players = players
+
+    def __getitem__(self, name: str) -> PlayerState:
+        return self._players[name]
+
+    def __iter__(self):
+        return iter(self._players)
+
+    def __len__(self) -> int:
+        return len(self._players)
 
+    def __contains__(self, name: object) -> bool:
+        return name in self._players
 
-@dataclass
+    # Straight to the dict's own views; the Mapping mixins would go through __getitem__ per key
+    def get(self, name: str, default=None):
+        return self._players.get(name, default)
+
+    def keys(self):
+        return self._players.keys()
+
+    def values(self):
+        return self._players.values()
+
+    def items(self):
+        return self._players.items()
+
+    def __reduce__(self):
+        return dict, (dict(self._players),)
+
+    def __repr__(self) -> str:
+        return f"PlayersView({self._players!r})"
+
+
+@dataclass(slots=True)
 class GameState:
-    """Read-only snapshot passed to agents."""
+    """Board snapshot passed to agents.
+
+    Agents normally get a detached `copy_for_agent` copy holding living units only. With
+    `GameEngine(trusted_agent=True)` they instead share the engine's snapshot: `players` is a
+    `PlayersView` over the live objects (dead units included, so check `is_alive()`) and the
+    obstacle/resource/control-point sequences are engine-owned tuples. Those objects are not
+    write-protected, so a trusted agent must treat them as read-only.
+    """
 
     width: int
     height: int
     mode: str
     mode_label: str
     mode_description: str
-    obstacles: List[Position]
-    resources: List[ResourceTile]
-    players: Dict[str, PlayerState]
+    obstacles: Sequence[Position]
+    resources: Sequence[ResourceTile]
+    players: Mapping[str, PlayerState]
     current_turn: int
     max_turns: int
     resource_types: List[str]
     resource_values: Dict[str, int]
     carry_limit: int
-    control_points: List[ControlPoint] = field(default_factory=list)
+    control_points: Sequence[ControlPoint] = field(default_factory=list)
     mode_params: Dict[str, int] = field(default_factory=dict)
+    obstacle_mask: int = 0  # bit `y * width + x` set for each obstacle cell
+    cell_class: Optional[bytearray] = None  # per-cell blocker codes, see grid.build_cell_class
+    # `players.items()` as a fixed tuple (Blue first) for per-frame readers; empty if the builder didn't set it
+    player_pairs: Tuple[Tuple[str, PlayerState], ...] = ()
 
     def find_unit(self, uid: str) -> Optional[Unit]:
         for p in self.players.values():
@@ -98,26 +205,16 @@ class GameState:
                 return p.units[uid]
         return None
 
-    def copy_for_agent(self) -> "GameState":
+    def copy_for_agent(self, pool: Optional["SnapshotPool"] = None) -> "GameState":
         # Provide a shallow but safe copy; units/resources are duplicated so agents cannot mutate engine state.
+        # With a pool the duplicates are recycled objects refreshed in place rather than new allocations.
+        if pool is None:
+            pool = SnapshotPool()
         players_copy: Dict[str, PlayerState] = {}
         for name, p in self.players.items():
-            units_copy = {
-                uid: Unit(
-                    uid=u.uid,
-                    owner=u.owner,
-                    hp=u.hp,
-                    attack=u.attack,
-                    position=u.position,
-                    carrying=dict(u.carrying),
-                )
-                for uid, u in p.units.items()
-                if u.is_alive()
-            }
-            players_copy[name] = PlayerState(
-                name=p.name, base=Base(p.base.owner, p.base.hp, p.base.position), units=units_copy, score=p.score
-            )
-            resources_copy = [ResourceTile(r.rtype, r.position) for r in self.resources]
+            units_copy = {uid: pool.unit(u) for uid, u in p.units.items() if u.is_alive()}
+            players_copy[name] = pool.player(p, units_copy)
+        resources_copy = [pool.resource(r) for r in self.resources]
         return GameState(
             width=self.width,
             height=self.height,
@@ -132,12 +229,91 @@ class GameState:
             resource_types=list(self.resource_types),
             resource_values=dict(self.resource_values),
             carry_limit=self.carry_limit,
-            control_points=[ControlPoint(cp.cid, cp.position, cp.controller, cp.stability, cp.peace_turns) for cp in self.control_points],
+            control_points=[pool.control_point(cp) for cp in self.control_points],
             mode_params=dict(self.mode_params),
+            obstacle_mask=self.obstacle_mask,
+            cell_class=None if self.cell_class is None else bytearray(self.cell_class),
+            player_pairs=tuple(players_copy.items()),
         )
 
 
-@dataclass
-class Action:
+class SnapshotPool:
+    """Recycled snapshot objects for `GameState.copy_for_agent`, keyed by uid/player/position/cid.
+
+    Every copy rewrites every field of the same objects in place, so nothing an agent writes carries
+    over, and a snapshot is only valid until the next copy made from the same pool. The pool grows
+    lazily to the largest population seen.
+    """
+
+    def __init__(self) -> None:
+        self.units: Dict[str, Unit] = {}
+        self.players: Dict[str, PlayerState] = {}
+        self.resources: Dict[Position, ResourceTile] = {}
+        self.control_points: Dict[int, ControlPoint] = {}
+
+    def unit(self, src: Unit) -> Unit:
+        snap = self.units.get(src.uid)
+        if snap is None:
+            snap = Unit(src.uid, src.owner, src.hp, src.attack, src.position, src.carrying, src.death_logged)
+            self.units[src.uid] = snap
+        else:
+            snap.uid = src.uid
+            snap.owner = src.owner
+            snap.hp = src.hp
+            snap.attack = src.attack
+            snap.position = src.position
+            snap.carrying = src.carrying
+            snap.death_logged = src.death_logged
+        return snap
+
+    def player(self, src: PlayerState, units: Dict[str, Unit]) -> PlayerState:
+        snap = self.players.get(src.name)
+        if snap is None:
+            snap = PlayerState(src.name, Base(src.base.owner, src.base.hp, src.base.position), units, src.score)
+            self.players[src.name] = snap
+        else:
+            snap.name = src.name
+            snap.base.owner = src.base.owner
+            snap.base.hp = src.base.hp
+            snap.base.position = src.base.position
+            snap.units = units
+            snap.score = src.score
+            snap.refresh_units()
+        return snap
+
+    def resource(self, src: ResourceTile) -> ResourceTile:
+        snap = self.resources.get(src.position)
+        if snap is None:
+            snap = ResourceTile(src.rtype, src.position)
+            self.resources[src.position] = snap
+        else:
+            snap.rtype = src.rtype
+            snap.position = src.position
+        return snap
+
+    def control_point(self, src: ControlPoint) -> ControlPoint:
+        snap = self.control_points.get(src.cid)
+        if snap is None:
+            snap = ControlPoint(src.cid, src.position, src.controller, src.stability, src.peace_turns)
+            self.control_points[src.cid] = snap
+        else:
+            snap.cid = src.cid
+            snap.position = src.position
+            snap.controller = src.controller
+            snap.stability = src.stability
+            snap.peace_turns = src.peace_turns
+        return snap
+
+
+class Action(NamedTuple):
     type: str  # "move", "harvest", "attack", "idle", "stabilize", "pacify"
     direction: Optional[Tuple[int, int]] = None  # for move/attack
+
+
+# Actions are immutable, so agents share these instances instead of allocating per unit.
+IDLE = Action("idle")
+HARVEST = Action("harvest")
+STABILIZE = Action("stabilize")
+PACIFY = Action("pacify")
+MOVES: Dict[Tuple[int, int], Action] = {d: Action("move", d) for d in ((0, 1), (0, -1), (1, 0), (-1, 0))}
+ATTACKS: Dict[Tuple[int, int], Action] = {d: Action("attack", d) for d in ((0, 1), (0, -1), (1, 0), (-1, 0))}
@@ -2,33 +2,107 @@
 from __future__ import annotations
 
 import random
-from typing import Dict, List, Optional, Tuple
-
-from entities import Action, Base, ControlPoint, GameState, PlayerState, Position, ResourceTile, Unit
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from agents import ParallelAgent
+from entities import (
+    CARGO_LANE_BITS,
+    CARGO_LANE_MASK,
+    Action,
+    Base,
+    ControlPoint,
+    GameState,
+    PlayerState,
+    PlayersView,
+    Position,
+    ResourceTile,
+    SnapshotPool,
+    Unit,
+    cargo_to_dict,
+)
 from game_modes import DEFAULT_MODE, get_mode
+from grid import build_cell_class, static_cell_class
 
 
 class GameEngine:
     def __init__(
-        self, agent_blue, agent_red, seed: Optional[int] = None, fast_mode: bool = False, mode_key: str = DEFAULT_MODE
+        self,
+        agent_blue,
+        agent_red,
+        seed: Optional[int] = None,
+        fast_mode: bool = False,
+        mode_key: str = DEFAULT_MODE,
+        trusted_agent: bool = False,
+        log_events: Optional[bool] = None,
+        simultaneous: bool = False,
+        event_log_limit: Optional[int] = None,
     ):
         self.mode = get_mode(mode_key)
         self.fast_mode = fast_mode
+        # Headless fast runs skip event text unless asked for; play() turns it on for a visualizer/recorder.
+        self._log_enabled = (not fast_mode) if log_events is None else log_events
+        # Agents get a private copy each turn unless trusted, in which case they read live engine
+        # objects (so must not mutate them); the built-in CLI/server agents opt in.
+        self.trusted_agent = trusted_agent
+        self._snapshot_pool = None if trusted_agent else SnapshotPool()
+        # Both agents plan from the same snapshot each turn; see _execute_simultaneous_turn.
+        self.simultaneous = simultaneous
         self.random = random.Random(seed)
         self.width = self.mode.board_width
         self.height = self.mode.board_height
         self.max_turns = self.mode.max_turns
+        # Cargo lane for each resource type (see entities.CARGO_LANE_BITS)
+        self._rtype_to_idx = {rtype: i for i, rtype in enumerate(self.mode.resource_types)}
+        self._resource_value_vec = tuple(self.mode.resource_values.get(r, 0) for r in self.mode.resource_types)
+        # Mode data never changes mid-match, so every snapshot shares these (copy_for_agent still copies them)
+        self._resource_types = list(self.mode.resource_types)
+        self._resource_values = dict(self.mode.resource_values)
+        self._mode_params = self.mode.to_state_meta()
+        # Bumped whenever board state may have changed; current_state() reuses its last build until then
+        self._state_version = 0
+        self._cached_state_key: Optional[tuple] = None
+        self._cached_state: Optional[GameState] = None
 
         self.obstacles: List[Position] = []
-        self.resources: Dict[Tuple[int, int], ResourceTile] = {}
-        self.control_points: Dict[Tuple[int, int], ControlPoint] = {}
+        self.obstacle_mask = 0  # bit `y * width + x` set for each obstacle cell
+        self._obstacle_cells: frozenset[int] = frozenset()  # same cells as packed ints, for the move checks
+        # Keyed by packed cell index (`y * width + x`, see _cell); the tiles carry their own Position
+        self.resources: Dict[int, ResourceTile] = {}
+        self.control_points: Dict[int, ControlPoint] = {}
+        # Running control-point tallies for the end-of-turn tick: cities held per side, and the
+        # points currently at peace keyed by cid. Kept in step by _handle_stabilize/_handle_pacify.
+        self._cities_held: Dict[str, int] = {"Blue": 0, "Red": 0}
+        # Snapshot lists shared by every GameState until their contents change: control points never
+        # come or go, and the resource list is rebuilt only after a harvest clears it.
+        # Tuples so a shared snapshot's sequences can't be reordered or resized by a reader
+        self._obstacle_tuple: Tuple[Position, ...] = ()
+        self._control_point_list: Tuple[ControlPoint, ...] = ()
+        self._resource_list: Optional[Tuple[ResourceTile, ...]] = None
+        self._peaceful: Dict[int, ControlPoint] = {}
         self.players: Dict[str, PlayerState] = {}
+        # Flat boards indexed by `y * width + x`, kept in step with moves and kills. A cell can hold
+        # several living units (spawn offsets clamp at the board edge), listed in player/unit order.
+        self._unit_board: List[List[Unit]] = []
+        self._base_board: List[Optional[Base]] = []
 
         self.agents = {"Blue": agent_blue, "Red": agent_red}
+        # Action type -> handler; every handler takes (unit, player, opponent, action)
+        self._action_dispatch = {
+            "move": self._handle_move,
+            "harvest": self._handle_harvest,
+            "attack": self._handle_attack,
+            "stabilize": self._handle_stabilize,
+            "pacify": self._handle_pacify,
+        }
         self.turn = 1
-        self.event_log: List[str] = []
+        self._turn_prefix = "Turn 1: "  # event line prefix, refreshed once per turn in play()
+        # With a limit only the most recent events are kept (e.g. the CLI's closing highlights)
+        self.event_log: Union[List[str], Deque[str]] = [] if event_log_limit is None else deque(maxlen=event_log_limit)
         self._base_destroyed: Optional[str] = None
-        self._reported_dead: set[str] = set()
+        # (victim's player, unit, killer's name) for lethal hits not yet reported
+        self._deaths_this_turn: List[Tuple[PlayerState, Unit, str]] = []
         self._setup_board()
 
     # Board setup
@@ -37,12 +111,26 @@ class GameEngine:
         red_base = Base("Red", self.mode.base_hp, Position(self.width - 1, self.height - 1))
         self.players["Blue"] = PlayerState("Blue", base=blue_base, units=self._spawn_units("Blue", blue_base.position))
         self.players["Red"] = PlayerState("Red", base=red_base, units=self._spawn_units("Red", red_base.position))
+        # The two PlayerState objects live for the whole match, so every snapshot shares this tuple
+        self._player_pairs = tuple(self.players.items())
 
+        # One shuffle of the free cells hands out distinct sites in order: obstacles, then control
+        # points, then resources. No rejection sampling, so setup cost no longer depends on density.
         forbidden = {blue_base.position, red_base.position}
-        self._spawn_obstacles(forbidden)
+        free = [Position(x, y) for y in range(self.height) for x in range(self.width) if Position(x, y) not in forbidden]
+        self.random.shuffle(free)
+        sites = iter(free)
+        self._spawn_obstacles(sites)
+        self._obstacle_cells = frozenset(self._cell(p) for p in self.obstacles)
         if self.mode.control_points:
-            self._spawn_control_points(forbidden)
-        self._spawn_resources(forbidden)
+            self._spawn_control_points(sites)
+        self._spawn_resources(sites)
+        self._obstacle_tuple = tuple(self.obstacles)
+        self._control_point_list = tuple(self.control_points.values())
+        self._rebuild_index()
+        self._static_cells = static_cell_class(
+            self.width, self.height, self.obstacle_mask, (p.base for p in self.players.values())
+        )
 
     def _spawn_units(self, owner: str, base_pos: Position) -> Dict[str, Unit]:
         units: Dict[str, Unit] = {}
@@ -57,102 +145,117 @@ class GameEngine:
             units[uid] = Unit(uid=uid, owner=owner, hp=self.mode.unit_hp, attack=self.mode.unit_attack, position=pos)
         return units
 
-    def _spawn_obstacles(self, forbidden: set) -> None:
-        while len(self.obstacles) < self.mode.num_obstacles:
-            pos = Position(self.random.randint(0, self.width - 1), self.random.randint(0, self.height - 1))
-            if pos in forbidden:
-                continue
-            if pos in self.obstacles:
-                continue
+    def _spawn_obstacles(self, sites: Iterator[Position]) -> None:
+        for pos in islice(sites, self.mode.num_obstacles):
             self.obstacles.append(pos)
-            forbidden.add(pos)
-
-    def _spawn_resources(self, forbidden: set) -> None:
-        while len(self.resources) < self.mode.resource_spawn_count:
-            pos = Position(self.random.randint(0, self.width - 1), self.random.randint(0, self.height - 1))
-            if pos in forbidden:
-                continue
-            if (pos.x, pos.y) in self.resources:
-                continue
-            rtype = self.random.choice(self.mode.resource_types)
-            self.resources[(pos.x, pos.y)] = ResourceTile(rtype=rtype, position=pos)
-
-    def _spawn_control_points(self, forbidden: set) -> None:
-        while len(self.control_points) < self.mode.control_points:
-            pos = Position(self.random.randint(0, self.width - 1), self.random.randint(0, self.height - 1))
-            if pos in forbidden:
-                continue
-            if (pos.x, pos.y) in self.control_points:
-                continue
-            cid = len(self.control_points)
-            self.control_points[(pos.x, pos.y)] = ControlPoint(cid=cid, position=pos)
-            forbidden.add(pos)
-
-    # Helpers
-    def _position_blocked(self, pos: Position) -> bool:
-        if not (0 <= pos.x < self.width and 0 <= pos.y < self.height):
-            return True
-        if pos in self.obstacles:
-            return True
-        return False
-
-    def _unit_at(self, pos: Position) -> Optional[Unit]:
+            self.obstacle_mask |= 1 << (pos.y * self.width + pos.x)
+
+    def _spawn_resources(self, sites: Iterator[Position]) -> None:
+        positions = list(islice(sites, self.mode.resource_spawn_count))
+        # One batched draw for every tile's type instead of a choice() call per tile
+        rtypes = self.random.choices(self.mode.resource_types, k=len(positions))
+        for pos, rtype in zip(positions, rtypes):
+            self.resources[self._cell(pos)] = ResourceTile(rtype=rtype, position=pos)
+
+    def _spawn_control_points(self, sites: Iterator[Position]) -> None:
+        for pos in islice(sites, self.mode.control_points):
+            self.control_points[self._cell(pos)] = ControlPoint(cid=len(self.control_points), position=pos)
+
+    def _rebuild_index(self) -> None:
+        width = self.width
+        self._unit_board = [[] for _ in range(width * self.height)]
+        self._base_board = [None] * (width * self.height)
         for player in self.players.values():
-            for unit in player.units.values():
-                if unit.is_alive() and unit.position == pos:
-                    return unit
-        return None
+            base_pos = player.base.position
+            self._base_board[base_pos.y * width + base_pos.x] = player.base
+            for unit in player.living_units():
+                self._unit_board[unit.position.y * width + unit.position.x].append(unit)
 
-    def _base_at(self, pos: Position) -> Optional[Base]:
-        for player in self.players.values():
-            if player.base.position == pos and player.base.hp > 0:
-                return player.base
-        return None
+    def _unindex_unit(self, unit: Unit) -> None:
+        self._unit_board[unit.position.y * self.width + unit.position.x].remove(unit)
+
+    # Helpers
+    def _cell(self, pos: Position) -> int:
+        return pos.y * self.width + pos.x
 
     def _resource_at(self, pos: Position) -> Optional[ResourceTile]:
-        return self.resources.get((pos.x, pos.y))
+        return self.resources.get(pos.y * self.width + pos.x)
 
     def _control_point_at(self, pos: Position) -> Optional[ControlPoint]:
-        return self.control_points.get((pos.x, pos.y))
+        return self.control_points.get(pos.y * self.width + pos.x)
 
     # Public API
+    def __getstate__(self) -> dict:
+        # Pickles and deep copies (checkpoints, rollouts) skip the cached snapshot; it is rebuilt on demand
+        state = self.__dict__.copy()
+        state["_cached_state_key"] = None
+        state["_cached_state"] = None
+        return state
+
     def current_state(self) -> GameState:
-        return GameState(
+        state = self._shared_state()
+        # Untrusted agents may have scribbled on their last copy, so they always get a fresh one
+        return state if self.trusted_agent else state.copy_for_agent(self._snapshot_pool)
+
+    def _shared_state(self) -> GameState:
+        """The uncopied snapshot over live engine objects, rebuilt only when the board changed."""
+        key = (self.turn, self._state_version)
+        if self._cached_state_key == key:
+            return self._cached_state
+        if self._resource_list is None:
+            self._resource_list = tuple(self.resources.values())
+        state = GameState(
             width=self.width,
             height=self.height,
             mode=self.mode.key,
             mode_label=self.mode.label,
             mode_description=self.mode.description,
-            obstacles=list(self.obstacles),
-            resources=list(self.resources.values()),
-            players=self.players,
+            obstacles=self._obstacle_tuple,
+            resources=self._resource_list,
+            players=PlayersView(self.players),
             current_turn=self.turn,
             max_turns=self.max_turns,
-            resource_types=list(self.mode.resource_types),
-            resource_values=dict(self.mode.resource_values),
+            resource_types=self._resource_types,
+            resource_values=self._resource_values,
             carry_limit=self.mode.unit_carry_limit,
-            control_points=list(self.control_points.values()),
-            mode_params=self.mode.to_state_meta(),
-        ).copy_for_agent()
+            control_points=self._control_point_list,
+            mode_params=self._mode_params,
+            obstacle_mask=self.obstacle_mask,
+            cell_class=build_cell_class(self._static_cells, self.width, self.players.values()),
+            player_pairs=self._player_pairs,
+        )
+        self._cached_state_key = key
+        self._cached_state = state
+        return state
 
     def play(self, visualizer=None, render_interval: Optional[int] = None, recorder=None) -> PlayerState:
         interval = render_interval if render_interval is not None else self.mode.render_interval
+        if visualizer or recorder:
+            self._log_enabled = True
+            # Per-turn event slices need the full, indexable log
+            if not isinstance(self.event_log, list):
+                self.event_log = list(self.event_log)
         while self.turn <= self.max_turns and not self._base_destroyed:
+            self._turn_prefix = f"Turn {self.turn}: "
             turn_event_start = len(self.event_log)
-            for name in ("Blue", "Red"):
-                if self._base_destroyed:
-                    break
-                self._execute_turn(name)
+            if self.simultaneous:
+                self._execute_simultaneous_turn()
+            else:
+                for name in ("Blue", "Red"):
+                    if self._base_destroyed:
+                        break
+                    self._execute_turn(name)
             self._tick_control_points()
+            # The renderer and recorder only read, so they share the uncopied snapshot
             if visualizer and (self.turn % interval == 0 or self.fast_mode):
-                visualizer.render(self.current_state(), self.event_log[turn_event_start:])
+                visualizer.render(self._shared_state(), self.event_log[turn_event_start:])
             if recorder:
-                recorder.record(self.current_state(), self.event_log[turn_event_start:])
+                recorder.record(self._shared_state(), self.event_log[turn_event_start:])
             self.turn += 1
         if visualizer:
-            visualizer.render(self.current_state(), self.event_log[-5:])
+            visualizer.render(self._shared_state(), self.event_log[-5:])
         if recorder:
-            recorder.record(self.current_state(), self.event_log[-5:])
+            recorder.record(self._shared_state(), self.event_log[-5:])
         return self._winner()
 
     def _execute_turn(self, player_name: str) -> None:
@@ -163,155 +266,244 @@ class GameEngine:
         for unit in player.living_units():
             self._attempt_delivery(unit, player)
 
-        state_for_agent = self.current_state()
-        agent = self.agents[player_name]
+        actions = self._request_actions(self.agents[player_name], player_name, self.current_state())
+        self._resolve_actions(player, opponent, actions)
+
+    def _execute_simultaneous_turn(self) -> None:
+        """Both sides deliver, then plan from one shared snapshot, then resolve in a per-turn random order.
+
+        A ParallelAgent seated on both sides is asked once and its actions are split by owner.
+        Resolution still goes side by side, so the first side's moves and kills can block the
+        second; the coin flip keeps that from always favouring Blue. As in the sequential loop,
+        the second side does not act once a base has fallen.
+        """
+        for player in self.players.values():
+            for unit in player.living_units():
+                self._attempt_delivery(unit, player)
+
+        blue_agent, red_agent = self.agents["Blue"], self.agents["Red"]
+        state = self.current_state()
+        if blue_agent is red_agent and isinstance(blue_agent, ParallelAgent):
+            joint = self._request_actions(blue_agent, "Blue", state)
+            planned = {"Blue": joint, "Red": joint}
+        else:
+            planned = {"Blue": self._request_actions(blue_agent, "Blue", state)}
+            # An untrusted agent may have scribbled on its copy; hand the other side a fresh one.
+            red_state = state if self.trusted_agent else self.current_state()
+            planned["Red"] = self._request_actions(red_agent, "Red", red_state)
+
+        order = ["Blue", "Red"]
+        self.random.shuffle(order)
+        for name in order:
+            if self._base_destroyed:
+                break
+            opponent = self.players["Red" if name == "Blue" else "Blue"]
+            self._resolve_actions(self.players[name], opponent, planned[name])
+
+    def _request_actions(self, agent, player_name: str, state: GameState) -> Dict[str, Action]:
         try:
-            actions = agent.choose_actions(state_for_agent)
+            actions = agent.choose_actions(state)
         except Exception as exc:  # Fail-safe: default to idle on agent crash
-            self.event_log.append(f"Turn {self.turn}: {player_name} agent error {exc}; units idle.")
+            if self._log_enabled:
+                self.event_log.append(f"{self._turn_prefix}{player_name} agent error {exc}; units idle.")
             actions = {}
+        return actions if isinstance(actions, dict) else {}
 
-        for unit in list(player.living_units()):
-            action = actions.get(unit.uid) if isinstance(actions, dict) else None
-            self._apply_action(unit, player, opponent, action)
+    def _resolve_actions(self, player: PlayerState, opponent: PlayerState, actions: Dict[str, Action]) -> None:
+        # Only the opponent's units can die here, and a death swaps in a new cached list, so this
+        # one stays a stable snapshot of the units that started the turn alive.
+        for unit in player.living_units():
+            self._apply_action(unit, player, opponent, actions.get(unit.uid))
 
-        # Clean up dead units
-        self._remove_dead_units(opponent, player_name)
-        self._remove_dead_units(player, opponent.name)
+        # Report this side's kills; most turns have none, so nothing is scanned
+        if self._deaths_this_turn:
+            self._report_deaths()
 
     def _apply_action(self, unit: Unit, player: PlayerState, opponent: PlayerState, action: Optional[Action]) -> None:
         if not action:
             return
-        if action.type == "move":
-            self._handle_move(unit, action)
-        elif action.type == "harvest":
-            self._handle_harvest(unit, player)
-        elif action.type == "attack":
-            self._handle_attack(unit, opponent, action)
-        elif action.type == "stabilize":
-            self._handle_stabilize(unit, player)
-        elif action.type == "pacify":
-            self._handle_pacify(unit, player)
-        # idle is default; no else needed
-
-    def _handle_move(self, unit: Unit, action: Action) -> None:
+        handler = self._action_dispatch.get(action.type)
+        if handler is None:  # idle (or unknown) does nothing
+            return
+        self._state_version += 1
+        handler(unit, player, opponent, action)
+
+    def _handle_move(self, unit: Unit, player: PlayerState, opponent: PlayerState, action: Action) -> None:
         if not action.direction:
             return
         dx, dy = action.direction
-        new_pos = Position(unit.position.x + dx, unit.position.y + dy)
-        if self._position_blocked(new_pos):
+        nx, ny = unit.position.x + dx, unit.position.y + dy
+        # Work on the flat cell index and only build a Position once the move goes through
+        if not (0 <= nx < self.width and 0 <= ny < self.height):
             return
-        target_base = self._base_at(new_pos)
-        if self._unit_at(new_pos):
+        cell = ny * self.width + nx
+        if cell in self._obstacle_cells or self._unit_board[cell]:
             return
-        if target_base and target_base.owner != unit.owner:
+        target_base = self._base_board[cell]
+        if target_base and target_base.hp > 0 and target_base.owner != unit.owner:
             return
-        unit.position = new_pos
+        self._unindex_unit(unit)
+        self._unit_board[cell].append(unit)
+        unit.position = Position(nx, ny)
 
-    def _handle_harvest(self, unit: Unit, player: PlayerState) -> None:
+    def _handle_harvest(self, unit: Unit, player: PlayerState, opponent: PlayerState, action: Action) -> None:
         if unit.cargo_count() >= self.mode.unit_carry_limit:
             return
         res = self._resource_at(unit.position)
         if not res:
             return
-        unit.carrying[res.rtype] = unit.carrying.get(res.rtype, 0) + 1
-        del self.resources[(res.position.x, res.position.y)]
-        self.event_log.append(f"Turn {self.turn}: {player.name} unit {unit.uid} harvested {res.rtype}.")
+        unit.add_cargo(self._rtype_to_idx[res.rtype])
+        del self.resources[self._cell(res.position)]
+        self._resource_list = None
+        if self._log_enabled:
+            self.event_log.append(f"{self._turn_prefix}{player.name} unit {unit.uid} harvested {res.rtype}.")
 
-    def _handle_attack(self, unit: Unit, opponent: PlayerState, action: Action) -> None:
+    def _handle_attack(self, unit: Unit, player: PlayerState, opponent: PlayerState, action: Action) -> None:
         if not action.direction:
             return
         dx, dy = action.direction
-        target_pos = Position(unit.position.x + dx, unit.position.y + dy)
-        target_unit = self._unit_at(target_pos)
-        target_base = self._base_at(target_pos)
+        nx, ny = unit.position.x + dx, unit.position.y + dy
+        if not (0 <= nx < self.width and 0 <= ny < self.height):
+            return
+        cell = ny * self.width + nx
+        stack = self._unit_board[cell]
+        target_unit = stack[0] if stack else None
+        target_base = self._base_board[cell]
+        if target_base is not None and target_base.hp <= 0:
+            target_base = None
         if target_unit and target_unit.owner != unit.owner:
+            hp_before = target_unit.hp
             target_unit.hp -= unit.attack
             if target_unit.hp <= 0:
                 opponent.units[target_unit.uid].hp = 0
+                opponent.mark_unit_lost(hp_before)
+                # Vacate the cell right away so later actions this turn can use it
+                self._unindex_unit(target_unit)
+                self._deaths_this_turn.append((opponent, target_unit, unit.owner))
                 self.players[unit.owner].score += self.mode.kill_score
-                self.event_log.append(
-                    f"Turn {self.turn}: {unit.owner} unit {unit.uid} defeated {target_unit.owner} unit {target_unit.uid}."
-                )
+                if self._log_enabled:
+                    self.event_log.append(
+                        f"{self._turn_prefix}{unit.owner} unit {unit.uid} defeated {target_unit.owner} unit {target_unit.uid}."
+                    )
+            else:
+                opponent.alive_hp_total -= unit.attack
         elif target_base and target_base.owner != unit.owner:
             target_base.hp -= unit.attack
             if target_base.hp < 0:
                 target_base.hp = 0
-            self.event_log.append(
-                f"Turn {self.turn}: {unit.owner} unit {unit.uid} hit {target_base.owner} base for {unit.attack}."
-            )
+            if self._log_enabled:
+                self.event_log.append(
+                    f"{self._turn_prefix}{unit.owner} unit {unit.uid} hit {target_base.owner} base for {unit.attack}."
+                )
             if target_base.hp <= 0:
                 self.players[unit.owner].score += self.mode.base_destroy_score
                 self._base_destroyed = target_base.owner
 
-    def _handle_stabilize(self, unit: Unit, player: PlayerState) -> None:
+    def _handle_stabilize(self, unit: Unit, player: PlayerState, opponent: PlayerState, action: Action) -> None:
         cp = self._control_point_at(unit.position)
         if not cp:
             return
         if cp.peace_turns > 0:
             cp.peace_turns = 0
-            self.event_log.append(f"Turn {self.turn}: {player.name} ended peace at City {cp.cid}.")
+            del self._peaceful[cp.cid]
+            if self._log_enabled:
+                self.event_log.append(f"{self._turn_prefix}{player.name} ended peace at City {cp.cid}.")
         if cp.controller is None:
             cp.controller = unit.owner
             cp.stability = 1
-            self.event_log.append(f"Turn {self.turn}: {player.name} unit {unit.uid} claimed neutral City {cp.cid}.")
+            self._cities_held[unit.owner] += 1
+            if self._log_enabled:
+                self.event_log.append(f"{self._turn_prefix}{player.name} unit {unit.uid} claimed neutral City {cp.cid}.")
             return
         if cp.controller == unit.owner:
             if cp.stability < self.mode.capture_threshold:
                 cp.stability += 1
                 if cp.stability == self.mode.capture_threshold:
-                    self.event_log.append(f"Turn {self.turn}: {player.name} fortified City {cp.cid}.")
+                    if self._log_enabled:
+                        self.event_log.append(f"{self._turn_prefix}{player.name} fortified City {cp.cid}.")
             return
         cp.stability -= 1
         if cp.stability <= 0:
-            self.event_log.append(f"Turn {self.turn}: {player.name} unit {unit.uid} neutralized City {cp.cid}.")
+            if self._log_enabled:
+                self.event_log.append(f"{self._turn_prefix}{player.name} unit {unit.uid} neutralized City {cp.cid}.")
+            self._cities_held[cp.controller] -= 1
             cp.controller = None
             cp.stability = 0
 
-    def _handle_pacify(self, unit: Unit, player: PlayerState) -> None:
+    def _handle_pacify(self, unit: Unit, player: PlayerState, opponent: PlayerState, action: Action) -> None:
         cp = self._control_point_at(unit.position)
         if not cp or self.mode.peace_duration <= 0:
             return
+        if cp.controller is not None:
+            self._cities_held[cp.controller] -= 1
         cp.controller = None
         cp.stability = 0
         cp.peace_turns = self.mode.peace_duration
-        self.event_log.append(f"Turn {self.turn}: {player.name} unit {unit.uid} brokered peace at City {cp.cid}.")
+        self._peaceful[cp.cid] = cp
+        if self._log_enabled:
+            self.event_log.append(f"{self._turn_prefix}{player.name} unit {unit.uid} brokered peace at City {cp.cid}.")
 
     def _attempt_delivery(self, unit: Unit, player: PlayerState) -> None:
         if unit.position != player.base.position:
             return
-        if unit.cargo_count() == 0:
+        carrying = unit.carrying
+        if not carrying:
             return
-        delivered_points = sum(self.mode.resource_values.get(r, 0) * count for r, count in unit.carrying.items())
-        if all(r in unit.carrying for r in self.mode.resource_types):
+        # Walk the cargo lanes in resource-type order alongside the precomputed point values
+        delivered_points = 0
+        combo = True
+        for value in self._resource_value_vec:
+            count = carrying & CARGO_LANE_MASK
+            if count:
+                delivered_points += value * count
+            else:
+                combo = False
+            carrying >>= CARGO_LANE_BITS
+        if combo:
             delivered_points += self.mode.delivery_combo_bonus
             combo_note = " + combo bonus"
         else:
             combo_note = ""
         player.score += delivered_points
-        self.event_log.append(
-            f"Turn {self.turn}: {player.name} unit {unit.uid} delivered {unit.carrying} for {delivered_points} pts{combo_note}."
-        )
-        unit.carrying.clear()
+        self._state_version += 1
+        if self._log_enabled:
+            self.event_log.append(
+                f"{self._turn_prefix}{player.name} unit {unit.uid} delivered {cargo_to_dict(unit.carrying, self.mode.resource_types)} for {delivered_points} pts{combo_note}."
+            )
+        unit.carrying = 0
 
     def _tick_control_points(self) -> None:
         if not self.control_points:
             return
-        for cp in self.control_points.values():
-            if cp.controller:
-                self.players[cp.controller].score += self.mode.control_score
-            if cp.peace_turns > 0:
-                cp.peace_turns -= 1
-                self.players["Blue"].score += self.mode.peace_reward
-                self.players["Red"].score += self.mode.peace_reward
-                if cp.peace_turns == 0:
-                    self.event_log.append(f"Turn {self.turn}: Peace at City {cp.cid} lapsed.")
-
-    def _remove_dead_units(self, player: PlayerState, killer_name: str) -> None:
-        for unit in player.units.values():
-            if unit.hp <= 0 and unit.uid not in self._reported_dead:
-                self._reported_dead.add(unit.uid)
-                self.event_log.append(f"Turn {self.turn}: {player.name} unit {unit.uid} fell in battle vs {killer_name}.")
+        self._state_version += 1
+        for name, held in self._cities_held.items():
+            if held:
+                self.players[name].score += held * self.mode.control_score
+        if not self._peaceful:
+            return
+        peace_income = len(self._peaceful) * self.mode.peace_reward
+        self.players["Blue"].score += peace_income
+        self.players["Red"].score += peace_income
+        # cid order, so lapse events come out as a scan over all control points would list them
+        for cid in sorted(self._peaceful):
+            cp = self._peaceful[cid]
+            cp.peace_turns -= 1
+            if cp.peace_turns == 0:
+                del self._peaceful[cid]
+                if self._log_enabled:
+                    self.event_log.append(f"{self._turn_prefix}Peace at City {cp.cid} lapsed.")
+
+    def _report_deaths(self) -> None:
+        deaths = self._deaths_this_turn
+        if len(deaths) > 1:
+            # Same order a scan over each side's units would give
+            deaths.sort(key=lambda d: list(d[0].units).index(d[1].uid))
+        for victim, unit, killer_name in deaths:
+            if not unit.death_logged:
+                unit.death_logged = True
+                if self._log_enabled:
+                    self.event_log.append(f"{self._turn_prefix}{victim.name} unit {unit.uid} fell in battle vs {killer_name}.")
+        deaths.clear()
 
     def _winner(self) -> PlayerState:
         blue = self.players["Blue"]
@@ -325,8 +517,8 @@ class GameEngine:
         if blue.score != red.score:
             return blue if blue.score > red.score else red
         # Tie-break with remaining health
-        blue_health = blue.base.hp + sum(u.hp for u in blue.living_units())
-        red_health = red.base.hp + sum(u.hp for u in red.living_units())
+        blue_health = blue.base.hp + blue.alive_hp_total
+        red_health = red.base.hp + red.alive_hp_total
         return blue if blue_health >= red_health else red
 
     # Utility to print a compact scoreline
@@ -7,7 +7,7 @@ from typing import Dict, List
 import config
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ModeDefinition:
     key: str
     label: str
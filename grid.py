@@ -0,0 +1,101 @@
+"""Flat board indexing helpers for ArenAI Grid agents."""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+from entities import Base, PlayerState, Position
+
+# Neighbor order matters: agents break ties by taking the first matching delta.
+DELTAS: Tuple[Tuple[int, int], ...] = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+# (neighbor cell index, (dx, dy))
+Neighbor = Tuple[int, Tuple[int, int]]
+NeighborTable = Tuple[Tuple[Neighbor, ...], ...]
+# Neighbor cell indexes only, for the flood fill's inner loop
+FloodTable = Tuple[Tuple[int, ...], ...]
+
+
+def obstacle_mask_for(obstacles: Iterable[Position], width: int) -> int:
+    """Bitmask with bit `y * width + x` set for every position given (obstacles, bases, ...)."""
+    mask = 0
+    for p in obstacles:
+        mask |= 1 << (p.y * width + p.x)
+    return mask
+
+
+@lru_cache(maxsize=32)
+def build_neighbor_table(width: int, height: int, obstacle_mask: int) -> NeighborTable:
+    """Per-cell tuple of in-bounds, non-obstacle neighbors.
+
+    Obstacles never move during a match, so the table is built once and shared across turns.
+    Obstacle cells keep their own entries: units can spawn on one and still walk off it.
+    """
+    table = []
+    for y in range(height):
+        for x in range(width):
+            cells = []
+            for delta in DELTAS:
+                nx, ny = x + delta[0], y + delta[1]
+                if 0 <= nx < width and 0 <= ny < height and not (obstacle_mask >> (ny * width + nx)) & 1:
+                    cells.append((ny * width + nx, delta))
+            table.append(tuple(cells))
+    return tuple(table)
+
+
+@lru_cache(maxsize=32)
+def build_flood_table(width: int, height: int, obstacle_mask: int) -> FloodTable:
+    """`build_neighbor_table` without the deltas, specialised once per board size and obstacle layout.
+
+    The flood fill only needs target cells; dropping the tuple unpack is cheaper per step than
+    generating board-specific code with the offsets and bounds checks inlined.
+    """
+    return tuple(tuple(nidx for nidx, _ in cells) for cells in build_neighbor_table(width, height, obstacle_mask))
+
+
+def flood_distances(neighbors: FloodTable, blocked: bytearray, goal: int) -> List[int]:
+    """Breadth-first step counts from cell `goal` to every reachable cell, -1 where unreachable.
+
+    Cells flagged in `blocked` are never entered, but the goal itself is always the root (it may
+    be a base or an occupied target). Works on flat preallocated lists rather than dicts.
+    """
+    dist = [-1] * len(neighbors)
+    dist[goal] = 0
+    queue = [goal]
+    push = queue.append
+    # Iterating a list while appending to it visits the new entries too: a FIFO without a deque.
+    for current in queue:
+        step = dist[current] + 1
+        for nidx in neighbors[current]:
+            if dist[nidx] < 0 and not blocked[nidx]:
+                dist[nidx] = step
+                push(nidx)
+    return dist
+
+
+# One byte per cell describing what blocks it; see `build_cell_class`.
+CELL_FREE = 0
+CELL_OBSTACLE = 1
+BASE_CELL_CLASS = {"Blue": 2, "Red": 3}
+UNIT_CELL_CLASS = {"Blue": 4, "Red": 5}
+
+
+def static_cell_class(width: int, height: int, obstacle_mask: int, bases: Iterable[Base]) -> bytearray:
+    """Cell classes for the parts of the board that never move: obstacles and bases."""
+    cells = bytearray(width * height)
+    for idx in range(width * height):
+        if (obstacle_mask >> idx) & 1:
+            cells[idx] = CELL_OBSTACLE
+    for base in bases:
+        cells[base.position.y * width + base.position.x] = BASE_CELL_CLASS[base.owner]
+    return cells
+
+
+def build_cell_class(static_cells: bytearray, width: int, players: Iterable[PlayerState]) -> bytearray:
+    """Copy of `static_cells` with every living unit stamped on top (units win over bases)."""
+    cells = bytearray(static_cells)
+    for player in players:
+        for unit in player.units.values():
+            if unit.is_alive():
+                cells[unit.position.y * width + unit.position.x] = UNIT_CELL_CLASS[unit.owner]
+    return cells
@@ -8,14 +8,13 @@ import time
 from agents import HeuristicAgent, RandomAgent
 from game_engine import GameEngine
 from game_modes import DEFAULT_MODE, GAME_MODES, get_mode
-from replay import ReplayRecorder, write_js_replay
-from visualizer import Visualizer
 
 
 AGENT_REGISTRY = {
     "random": RandomAgent,
     "heuristic": HeuristicAgent,
 }
+REPLAY_PATH = "web/game_data.js"
 
 
 def parse_args() -> argparse.Namespace:
@@ -45,40 +44,70 @@ def main() -> None:
     mode_def = get_mode(args.mode)
     agent_blue = build_agent(args.blue, seed)
     agent_red = build_agent(args.red, seed + 1 if seed is not None else None)
-    visualizer = None if args.fast else Visualizer(
-        log_to_file=args.log, clear_screen=not args.no_clear, log_file_path=mode_def.log_file
-    )
-    recorder = ReplayRecorder() if args.export_web else None
+    visualizer = None
+    if not args.fast:
+        # Headless runs (and batch sweeps under PyPy) never pay for the terminal renderer import
+        from visualizer import Visualizer
+
+        visualizer = Visualizer(log_to_file=args.log, clear_screen=not args.no_clear, log_file_path=mode_def.log_file)
+    recorder = None
+    if args.export_web:
+        # Only replay exports need the recorder; frames stream to a temp file as the match plays
+        from replay import ReplayRecorder, open_js_replay
+
+        recorder = ReplayRecorder(sink=open_js_replay(REPLAY_PATH), publish_path=REPLAY_PATH)
     interval = args.render_every if args.render_every is not None else mode_def.render_interval
 
-    engine = GameEngine(agent_blue, agent_red, seed=seed, fast_mode=args.fast, mode_key=mode_def.key)
+    # The CLI always reports key events, so keep logging even in fast mode; a headless run that
+    # neither dumps nor exports the log only needs the last few for the closing summary.
+    keep_recent = args.fast and not (args.log or args.export_web)
+    engine = GameEngine(
+        agent_blue,
+        agent_red,
+        seed=seed,
+        fast_mode=args.fast,
+        mode_key=mode_def.key,
+        trusted_agent=True,  # the registry agents only read their state
+        log_events=True,
+        event_log_limit=5 if keep_recent else None,
+    )
     start = time.time()
-    winner_state = engine.play(visualizer=visualizer, render_interval=interval, recorder=recorder)
+    try:
+        winner_state = engine.play(visualizer=visualizer, render_interval=interval, recorder=recorder)
+        if recorder:
+            recorder.finish(winner_state.name)
+    finally:
+        # A match that died part-way leaves the previous replay in place
+        if recorder:
+            recorder.close()
     elapsed = time.time() - start
+    if visualizer:
+        visualizer.close()
     final_state = engine.current_state()
     blue = final_state.players["Blue"]
     red = final_state.players["Red"]
 
     if args.fast and args.log:
         # dump log even without rendering
+        from visualizer import Visualizer
+
         vis = Visualizer(log_to_file=True, clear_screen=False, log_file_path=mode_def.log_file)
         vis._write_events(engine.event_log)
+        vis.close()
 
     print("\nMatch complete.")
     print(f"Mode: {mode_def.label}")
     print(f"Winner: {winner_state.name}")
     print(f"Final score -> Blue: {blue.score} | Red: {red.score}")
     print(f"Base HP -> Blue: {blue.base.hp} | Red: {red.base.hp}")
-    print(f"Units alive -> Blue: {sum(1 for u in blue.units.values() if u.is_alive())} | Red: {sum(1 for u in red.units.values() if u.is_alive())}")
+    print(f"Units alive -> Blue: {blue.alive_count} | Red: {red.alive_count}")
     print(f"Duration: {elapsed:.2f}s")
     print(f"Seed: {seed}")
     if recorder:
-        replay_dict = recorder.to_dict(winner_state.name)
-        write_js_replay(replay_dict)
-        print("Replay exported to web/game_data.js (open web/index.html to view).")
+        print(f"Replay exported to {REPLAY_PATH} (open web/index.html to view).")
     if engine.event_log:
         print("Key events:")
-        for line in engine.event_log[-5:]:
+        for line in list(engine.event_log)[-5:]:
             print(f"- {line}")
 
 
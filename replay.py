@@ -3,58 +3,100 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Dict, List
+from typing import BinaryIO, Dict, List, Optional, Tuple
 
-from entities import GameState
+from entities import GameState, cargo_to_dict
+
+# Optional C serializers, fastest first; every tier produces the same data as the stdlib json fallback
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+try:
+    import ujson
+except ImportError:  # pragma: no cover - depends on the environment
+    ujson = None
+
+
+def dumps_json(payload: object) -> bytes:
+    """Compact UTF-8 JSON for replays and API responses, via orjson or ujson when installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    if ujson is not None:
+        # ujson is compact by default but returns str, and escapes "/" unless told not to
+        return ujson.dumps(payload, ensure_ascii=False, escape_forward_slashes=False).encode("utf-8")
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+# (meta key, GameState attribute, default when the state lacks it)
+_META_SPEC = (
+    ("width", "width", 0),
+    ("height", "height", 0),
+    ("maxTurns", "max_turns", 0),
+    ("mode", "mode", "classic"),
+    ("modeLabel", "mode_label", ""),
+    ("modeDescription", "mode_description", ""),
+    ("resourceTypes", "resource_types", []),
+    ("resourceValues", "resource_values", {}),
+    ("carryLimit", "carry_limit", 0),
+    ("modeParams", "mode_params", {}),
+)
 
 
 class ReplayRecorder:
-    """Captures turn-by-turn snapshots that can be rendered on the web."""
+    """Captures turn-by-turn snapshots that can be rendered on the web.
+
+    With a binary `sink` each frame is serialized and written as soon as it is recorded, so only
+    one frame is alive at a time; call `finish` to close out the JS file. A sink from
+    `open_js_replay(path)` is a temp file: pass the same `publish_path` and `finish` moves it over
+    `path`, while `close` without `finish` throws the partial replay away (see `open_js_replay`).
+    """
 
-    def __init__(self):
+    def __init__(self, sink: Optional[BinaryIO] = None, publish_path: Optional[str] = None):
         self.frames: List[Dict] = []
         self.meta: Dict[str, object] = {}
+        self._sink = sink
+        self._publish_path = publish_path
+        self._finished = False
+        self._streamed_frames = 0
+        # Obstacles and bases never move, so every frame points at the same coordinates
+        self._obstacles: List[Tuple[int, int]] = []
+        self._base_pos: List[Tuple[int, int]] = []  # parallel to the state's player pairs
 
     def record(self, state: GameState, events: List[str]) -> None:
+        players = state.player_pairs or tuple(state.players.items())
         if not self.meta:
-            self.meta = {
-                "width": state.width,
-                "height": state.height,
-                "maxTurns": state.max_turns,
-                "mode": getattr(state, "mode", "classic"),
-                "modeLabel": getattr(state, "mode_label", ""),
-                "modeDescription": getattr(state, "mode_description", ""),
-                "resourceTypes": getattr(state, "resource_types", []),
-                "resourceValues": getattr(state, "resource_values", {}),
-                "carryLimit": getattr(state, "carry_limit", 0),
-                "modeParams": getattr(state, "mode_params", {}),
-            }
+            self.meta = {key: getattr(state, attr, default) for key, attr, default in _META_SPEC}
+            self._obstacles = [(p.x, p.y) for p in state.obstacles]
+            self._base_pos = [(p.base.position.x, p.base.position.y) for _, p in players]
+        # Coordinates go out as plain tuples: they serialize as JSON arrays and allocate in one shot
+        resource_types = state.resource_types
         frame = {
             "turn": state.current_turn,
             "events": list(events),
-            "obstacles": [[p.x, p.y] for p in state.obstacles],
-            "resources": [{"t": r.rtype, "p": [r.position.x, r.position.y]} for r in state.resources],
+            "obstacles": self._obstacles,
+            "resources": [{"t": r.rtype, "p": (r.position.x, r.position.y)} for r in state.resources],
             "bases": {
-                name: {"hp": p.base.hp, "pos": [p.base.position.x, p.base.position.y], "score": p.score}
-                for name, p in state.players.items()
+                name: {"hp": p.base.hp, "pos": pos, "score": p.score}
+                for (name, p), pos in zip(players, self._base_pos)
             },
             "units": {
                 name: [
                     {
                         "id": u.uid,
                         "hp": u.hp,
-                        "pos": [u.position.x, u.position.y],
-                        "cargo": dict(u.carrying),
+                        "pos": (u.position.x, u.position.y),
+                        # Most units carry nothing on most turns; skip unpacking the lanes for them
+                        "cargo": cargo_to_dict(u.carrying, resource_types) if u.carrying else {},
                     }
-                    for u in p.units.values()
-                    if u.is_alive()
+                    for u in p.living_units()
                 ]
-                for name, p in state.players.items()
+                for name, p in players
             },
             "controlPoints": [
                 {
                     "id": cp.cid,
-                    "pos": [cp.position.x, cp.position.y],
+                    "pos": (cp.position.x, cp.position.y),
                     "controller": cp.controller,
                     "stability": cp.stability,
                     "peace": cp.peace_turns,
@@ -62,7 +104,42 @@ class ReplayRecorder:
                 for cp in getattr(state, "control_points", [])
             ],
         }
-        self.frames.append(frame)
+        if self._sink is None:
+            self.frames.append(frame)
+            return
+        self._sink.write(b"," if self._streamed_frames else self._stream_header())
+        self._sink.write(dumps_json(frame))
+        self._streamed_frames += 1
+
+    def _stream_header(self) -> bytes:
+        return b'const replayData = {"meta":' + dumps_json(self.meta) + b',"frames":['
+
+    def finish(self, winner: str | None = None) -> None:
+        """Terminate a streamed replay; the sink then holds the same JS `write_js_replay` writes."""
+        if self._sink is None:
+            return
+        if not self._streamed_frames:
+            self._sink.write(self._stream_header())
+        self._sink.write(b"]")
+        if winner:
+            self._sink.write(b',"winner":' + dumps_json(winner))
+        self._sink.write(b"};\n")
+        self._finished = True
+        self.close()
+
+    def close(self) -> None:
+        """Close the sink, publishing a finished replay or discarding a partial one; safe to repeat."""
+        if self._sink is None:
+            return
+        sink, self._sink = self._sink, None
+        sink.close()
+        if self._publish_path is None:
+            return
+        partial = _partial_path(self._publish_path)
+        if self._finished:
+            os.replace(partial, self._publish_path)
+        elif os.path.exists(partial):
+            os.remove(partial)
 
     def to_dict(self, winner: str | None = None) -> Dict:
         data = {"meta": self.meta, "frames": self.frames}
@@ -71,10 +148,24 @@ class ReplayRecorder:
         return data
 
 
+def _partial_path(path: str) -> str:
+    return path + ".tmp"
+
+
+def open_js_replay(path: str = "web/game_data.js") -> BinaryIO:
+    """Open a temp file beside `path` as a streaming sink for `ReplayRecorder(sink=..., publish_path=path)`.
+
+    `path` itself is untouched until the recorder finishes, so a crashed or interrupted match never
+    leaves a half-written replay where the viewer (or a running serve_web) would load it.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(_partial_path(path), "wb")
+
+
 def write_js_replay(replay: Dict, path: str = "web/game_data.js") -> None:
     """Write replay data to a JS file that defines `const replayData = ...`."""
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("const replayData = ")
-        json.dump(replay, f)
-        f.write(";\n")
+    with open(path, "wb") as f:
+        f.write(b"const replayData = ")
+        f.write(dumps_json(replay))
+        f.write(b";\n")
@@ -0,0 +1,69 @@
+"""Batch match runner that spreads independent ArenAI Grid games across processes."""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterable, List, Optional
+
+from game_engine import GameEngine
+from game_modes import DEFAULT_MODE
+
+# Called as `factory(seed=...)`; agent classes themselves qualify and pickle cleanly.
+AgentFactory = Callable[..., object]
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    """Compact per-game summary returned from workers (the full state stays in the worker)."""
+
+    seed: Optional[int]
+    winner: str
+    blue_score: int
+    red_score: int
+    turns: int
+
+
+def _play_one(
+    seed: Optional[int], blue_factory: AgentFactory, red_factory: AgentFactory, mode_key: str, trusted_agent: bool
+) -> MatchResult:
+    agent_blue = blue_factory(seed=seed)
+    agent_red = red_factory(seed=None if seed is None else seed + 1)
+    engine = GameEngine(
+        agent_blue, agent_red, seed=seed, fast_mode=True, mode_key=mode_key, trusted_agent=trusted_agent
+    )
+    winner = engine.play()
+    return MatchResult(
+        seed=seed,
+        winner=winner.name,
+        blue_score=engine.players["Blue"].score,
+        red_score=engine.players["Red"].score,
+        turns=engine.turn - 1,
+    )
+
+
+def run_games(
+    n: int,
+    blue_factory: AgentFactory,
+    red_factory: AgentFactory,
+    seeds: Optional[Iterable[Optional[int]]] = None,
+    mode_key: str = DEFAULT_MODE,
+    max_workers: Optional[int] = None,
+    trusted_agent: bool = False,
+) -> List[MatchResult]:
+    """Play `n` matches (seeds 0..n-1, or the first `n` of `seeds`) and return results in order.
+
+    Each game runs start to finish in one worker process; `max_workers=1` plays them inline.
+    `trusted_agent` is passed to each GameEngine (only for agents that never mutate their state).
+    """
+    seed_list = list(islice(seeds, n)) if seeds is not None else list(range(n))
+    play = partial(
+        _play_one, blue_factory=blue_factory, red_factory=red_factory, mode_key=mode_key, trusted_agent=trusted_agent
+    )
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1:
+        return [play(seed) for seed in seed_list]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(play, seed_list))
@@ -2,22 +2,32 @@
 from __future__ import annotations
 
 import argparse
-import json
+import datetime
+import email.utils
+import gzip
+import mimetypes
+import os
+import socket
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Optional
-from urllib.parse import parse_qs, urlparse
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, unquote_plus, urlparse
 
 from agents import HeuristicAgent, RandomAgent
 from game_engine import GameEngine
 from game_modes import DEFAULT_MODE, GAME_MODES
-from replay import ReplayRecorder
+from replay import ReplayRecorder, dumps_json
 
 
 AGENT_REGISTRY = {
     "random": RandomAgent,
     "heuristic": HeuristicAgent,
 }
+_AGENT_NAMES = frozenset(AGENT_REGISTRY)
+# Fixed part of every JSON response header block; the status line and length are filled in per reply
+_JSON_HEADERS = b"Content-Type: application/json\r\nAccess-Control-Allow-Origin: *\r\nVary: Accept-Encoding\r\n"
+# Small error replies are not worth compressing; replays are highly redundant and shrink several-fold
+_GZIP_MIN_BYTES = 1024
 
 BASE_DIR = Path(__file__).resolve().parent
 WEB_DIR = BASE_DIR / "web"
@@ -28,15 +38,114 @@ def build_agent(agent_name: str, seed: Optional[int]) -> object:
     return cls(seed=seed)
 
 
+def parse_query(query: str) -> Dict[str, str]:
+    """Flat single-pass query parse: first value per key wins and blank values are dropped, as with parse_qs."""
+    params: Dict[str, str] = {}
+    for pair in query.split("&"):
+        key, sep, value = pair.partition("=")
+        if not sep or not value:
+            continue
+        key = unquote_plus(key)
+        if key not in params:
+            params[key] = unquote_plus(value)
+    return params
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding value allows gzip, honouring `q=0` refusals (of gzip itself or `*`)."""
+    wildcard = None
+    for entry in accept_encoding.split(","):
+        coding, _, params = entry.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "x-gzip", "*"):
+            continue
+        allowed = True
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    allowed = float(value) > 0
+                except ValueError:
+                    allowed = False
+        if coding == "*":
+            wildcard = allowed
+        else:
+            return allowed
+    return bool(wildcard)
+
+
 def run_match(blue: str, red: str, seed: Optional[int], mode: str) -> dict:
     agent_blue = build_agent(blue, seed)
     agent_red = build_agent(red, None if seed is None else seed + 1)
     recorder = ReplayRecorder()
-    engine = GameEngine(agent_blue, agent_red, seed=seed, fast_mode=True, mode_key=mode)
+    # The registry agents only read their state, so they can skip the per-turn copy
+    engine = GameEngine(agent_blue, agent_red, seed=seed, fast_mode=True, mode_key=mode, trusted_agent=True)
     winner_state = engine.play(recorder=recorder)
     return recorder.to_dict(winner_state.name)
 
 
+# Resolved file -> (mtime_ns, size, full 200 response bytes, validator header lines, etag) for files
+# under web/. Keyed by the resolved path so every spelling of a URL shares one entry; entries are
+# checked against a stat on every hit, so files regenerated on disk (e.g. game_data.js) are picked up.
+_STATIC_CACHE: Dict[Path, Tuple[int, int, bytes, str, str]] = {}
+
+
+def _static_file(url_path: str) -> Optional[Path]:
+    rel = unquote(url_path).lstrip("/") or "index.html"
+    path = (WEB_DIR / rel).resolve()
+    if WEB_DIR not in path.parents or not path.is_file():
+        return None
+    return path
+
+
+def _not_modified(headers, etag: str, mtime: float) -> bool:
+    """Conditional GET check, with If-None-Match taking precedence as in SimpleHTTPRequestHandler."""
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        return any(tag.strip() in ("*", etag) for tag in if_none_match.split(","))
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = email.utils.parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=datetime.timezone.utc)
+    return int(mtime) <= since.timestamp()
+
+
+def static_response(url_path: str, protocol: str = "HTTP/1.0", headers=None) -> Optional[Tuple[int, bytes]]:
+    """(status, prebuilt response) for a file under web/, or None to let the stock handler deal with it.
+
+    With request `headers` a matching If-None-Match/If-Modified-Since gets a 304 instead of the body.
+    """
+    path = _static_file(url_path)
+    if path is None:
+        return None
+    stat = path.stat()
+    cached = _STATIC_CACHE.get(path)
+    if not (cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size):
+        body = path.read_bytes()
+        mime = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        validators = f"Last-Modified: {email.utils.formatdate(stat.st_mtime, usegmt=True)}\r\nETag: {etag}\r\n"
+        head = f"{protocol} 200 OK\r\nContent-Type: {mime}\r\nContent-Length: {len(body)}\r\n{validators}\r\n"
+        cached = (stat.st_mtime_ns, stat.st_size, head.encode("latin-1") + body, validators, etag)
+        _STATIC_CACHE[path] = cached
+    if headers is not None and _not_modified(headers, cached[4], stat.st_mtime):
+        return 304, f"{protocol} 304 Not Modified\r\n{cached[3]}\r\n".encode("latin-1")
+    return 200, cached[2]
+
+
+def preload_static() -> None:
+    """Read every file under web/ into the static cache."""
+    for path in WEB_DIR.rglob("*"):
+        if path.is_file():
+            url_path = "/" + path.relative_to(WEB_DIR).as_posix()
+            static_response(url_path, ArenAIRequestHandler.protocol_version)
+
+
 class ArenAIRequestHandler(SimpleHTTPRequestHandler):
     """Serves static files from web/ and handles /api/run to generate a fresh match."""
 
@@ -47,20 +156,26 @@ class ArenAIRequestHandler(SimpleHTTPRequestHandler):
         parsed = urlparse(self.path)
         if parsed.path == "/api/run":
             return self._handle_run(parsed)
+        response = static_response(parsed.path, self.protocol_version, self.headers)
+        if response is not None:
+            status, data = response
+            self.log_request(status)
+            self.wfile.write(data)
+            return None
         return super().do_GET()
 
     def _handle_run(self, parsed):
-        params = parse_qs(parsed.query)
-        blue = params.get("blue", ["heuristic"])[0]
-        red = params.get("red", ["random"])[0]
-        seed_param = params.get("seed", [None])[0]
-        mode = params.get("mode", [DEFAULT_MODE])[0]
+        params = parse_query(parsed.query)
+        blue = params.get("blue", "heuristic")
+        red = params.get("red", "random")
+        seed_param = params.get("seed")
+        mode = params.get("mode", DEFAULT_MODE)
         try:
             seed = int(seed_param) if seed_param is not None else None
         except ValueError:
             return self._send_json({"error": "Invalid seed"}, status=400)
 
-        if blue not in AGENT_REGISTRY or red not in AGENT_REGISTRY:
+        if blue not in _AGENT_NAMES or red not in _AGENT_NAMES:
             return self._send_json({"error": f"Agents must be in {list(AGENT_REGISTRY.keys())}"}, status=400)
         if mode not in GAME_MODES:
             return self._send_json({"error": f"Mode must be in {list(GAME_MODES.keys())}"}, status=400)
@@ -69,35 +184,81 @@ class ArenAIRequestHandler(SimpleHTTPRequestHandler):
         return self._send_json(replay)
 
     def _send_json(self, payload: dict, status: int = 200):
-        body = json.dumps(payload).encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        # Already UTF-8 bytes (orjson when installed), so no separate encode step
+        body = dumps_json(payload)
+        encoding = b""
+        if len(body) >= _GZIP_MIN_BYTES and accepts_gzip(self.headers.get("Accept-Encoding", "")):
+            # Level 1 is several times faster than the default and still compresses replay JSON well
+            body = gzip.compress(body, compresslevel=1)
+            encoding = b"Content-Encoding: gzip\r\n"
+        self.log_request(status)
+        reason = self.responses[status][0]
+        status_line = b"%s %d %s\r\n" % (self.protocol_version.encode("latin-1"), status, reason.encode("latin-1"))
+        # Status line, headers and body leave in a single write
+        self.wfile.write(status_line + _JSON_HEADERS + encoding + b"Content-Length: %d\r\n\r\n" % len(body) + body)
+
+
+class ArenAIHTTPServer(ThreadingHTTPServer):
+    """Threading server whose listening socket can be shared across forked workers (SO_REUSEPORT).
+
+    Port sharing is only switched on with `share_port=True`, so a single server still fails fast
+    when the port is taken. The larger send buffer keeps multi-megabyte replay responses from
+    stalling on the kernel buffer.
+    """
+
+    send_buffer_bytes = 1 << 20
+
+    def __init__(self, server_address, handler_class, share_port: bool = False):
+        self.share_port = share_port
+        super().__init__(server_address, handler_class)
+
+    def server_bind(self):
+        if self.share_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer_bytes)
+        super().server_bind()
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Serve the live ArenAI Grid web viewer with /api/run.")
     parser.add_argument("--port", type=int, default=8000, help="Port for the local web server")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Server processes sharing the port (needs fork and SO_REUSEPORT)"
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    print(f"Serving from {WEB_DIR} at http://localhost:{args.port}")
+    workers = max(1, args.workers)
+    if workers > 1 and not (hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT")):
+        print("Multiple workers need fork() and SO_REUSEPORT; serving with a single process.")
+        workers = 1
+    print(f"Serving from {WEB_DIR} at http://localhost:{args.port} ({workers} worker{'s' if workers > 1 else ''})")
     print(
         "Use /api/run?blue=heuristic&red=random&seed=123&mode=world to trigger a match, or click 'Run Match' in the UI."
     )
 
-    with ThreadingHTTPServer(("", args.port), ArenAIRequestHandler) as httpd:
+    # Each worker binds its own listener on the shared port; the kernel spreads connections between them
+    children = []
+    for _ in range(workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            children = []
+            break
+        children.append(pid)
+
+    preload_static()
+    with ArenAIHTTPServer(("", args.port), ArenAIRequestHandler, share_port=workers > 1) as httpd:
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
-            print("Shutting down server.")
+            if children or workers == 1:
+                print("Shutting down server.")
         finally:
             httpd.server_close()
+            for pid in children:
+                os.waitpid(pid, 0)
 
 
 if __name__ == "__main__":
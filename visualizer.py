@@ -2,73 +2,125 @@
 from __future__ import annotations
 
 import os
-from typing import List, Optional
+import sys
+from typing import Dict, List, Optional
 
 import config
 from entities import GameState
 
+# Clear screen and home the cursor; written inline instead of spawning `clear`/`cls` each frame
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+
+
+def _enable_windows_ansi() -> None:
+    """Turn on VT escape processing for the Windows 10+ console (a no-op where unsupported)."""
+    try:
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            kernel32.SetConsoleMode(handle, mode.value | 0x0004)  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    except (AttributeError, OSError):
+        pass
+
 
 class Visualizer:
+    # (base, unit) grid characters per side
+    _BASE_CHARS = {"Blue": ("B", "b"), "Red": ("R", "r")}
+
     def __init__(self, log_to_file: bool = False, clear_screen: bool = True, log_file_path: Optional[str] = None):
         self.log_to_file = log_to_file
         self.clear_screen = clear_screen
         self.log_file_path = log_file_path or config.LOG_FILE
+        if clear_screen and os.name == "nt":
+            _enable_windows_ansi()
+        # One line-buffered handle for the whole match instead of reopening the log every frame
+        self._log_fh = None
         if log_to_file:
-            with open(self.log_file_path, "w", encoding="utf-8") as f:
-                f.write("ArenAI Grid match log\n")
+            self._log_fh = open(self.log_file_path, "w", encoding="utf-8", buffering=1)
+            self._log_fh.write("ArenAI Grid match log\n")
+        # Empty board with obstacles painted in; rebuilt only when the board size or obstacles change
+        self._static_rows: List[List[str]] = []
+        self._static_key: Optional[tuple] = None
+        # Resource type -> grid label ("1", "2", ...), rebuilt only if the mode's type list changes
+        self._rtype_chars: Dict[str, str] = {}
+        self._rtype_key: Optional[tuple] = None
+
+    def _static_layer(self, state: GameState) -> List[List[str]]:
+        # The engine's obstacle bitmask identifies the layout for free; hand-built states without one
+        # fall back to the identity and length of their obstacle list
+        mask = getattr(state, "obstacle_mask", 0)
+        layout = mask if mask else (id(state.obstacles), len(state.obstacles))
+        key = (state.width, state.height, layout)
+        if key != self._static_key:
+            rows = [["."] * state.width for _ in range(state.height)]
+            for obs in state.obstacles:
+                rows[obs.y][obs.x] = "#"
+            self._static_rows = rows
+            self._static_key = key
+        return self._static_rows
 
     def render(self, state: GameState, events: List[str]) -> None:
-        if self.clear_screen:
-            os.system("cls" if os.name == "nt" else "clear")
-        grid = [["." for _ in range(state.width)] for _ in range(state.height)]
-        res_types = getattr(state, "resource_types", config.RESOURCE_TYPES)
-        res_lookup = {rtype: idx for idx, rtype in enumerate(res_types)}
-
-        for obs in state.obstacles:
-            grid[obs.y][obs.x] = "#"
+        grid = [row[:] for row in self._static_layer(state)]
+        res_types = tuple(getattr(state, "resource_types", config.RESOURCE_TYPES))
+        if res_types != self._rtype_key:
+            self._rtype_chars = {rtype: str(idx + 1) for idx, rtype in enumerate(res_types)}
+            self._rtype_key = res_types
+        rtype_chars = self._rtype_chars
+
         for res in state.resources:
-            label = res_lookup.get(res.rtype)
-            grid[res.position.y][res.position.x] = str(label + 1) if label is not None else "?"
+            grid[res.position.y][res.position.x] = rtype_chars.get(res.rtype, "?")
         for cp in getattr(state, "control_points", []):
             current = grid[cp.position.y][cp.position.x]
             if current == ".":
                 marker = "P" if cp.peace_turns > 0 else ("C" if cp.controller == "Blue" else "c" if cp.controller == "Red" else "o")
                 grid[cp.position.y][cp.position.x] = marker
-        for player in state.players.values():
-            base_char = "B" if player.name == "Blue" else "R"
+        players = state.player_pairs or tuple(state.players.items())
+        for _, player in players:
+            base_char, unit_char = self._BASE_CHARS.get(player.name, ("R", "r"))
             bx, by = player.base.position.x, player.base.position.y
             grid[by][bx] = base_char
-            for unit in player.units.values():
-                if not unit.is_alive():
-                    continue
-                ux, uy = unit.position.x, unit.position.y
-                grid[uy][ux] = base_char.lower()
+            # The cached living list is the only pass over units; the HUD count reads alive_count
+            for unit in player.living_units():
+                grid[unit.position.y][unit.position.x] = unit_char
 
         mode_label = getattr(state, "mode_label", "") or getattr(state, "mode", "")
-        print(f"ArenAI Grid – {mode_label} – Turn {state.current_turn}/{state.max_turns}")
-        b_state = state.players["Blue"]
-        r_state = state.players["Red"]
-        blue_units = sum(1 for u in b_state.units.values() if u.is_alive())
-        red_units = sum(1 for u in r_state.units.values() if u.is_alive())
-        print(f"Scores: Blue {b_state.score} | Red {r_state.score}")
-        print(f"Units: Blue {blue_units} | Red {red_units}")
-        print(f"Bases HP: Blue {b_state.base.hp} | Red {r_state.base.hp}")
-        print()
-        for row in grid:
-            print(" ".join(row))
-        print()
+        # Engine snapshots list Blue then Red
+        b_state = players[0][1]
+        r_state = players[1][1]
+        blue_units = b_state.alive_count
+        red_units = r_state.alive_count
+        # Assemble the whole frame and hand it to stdout in one write
+        out = [
+            f"ArenAI Grid – {mode_label} – Turn {state.current_turn}/{state.max_turns}",
+            f"Scores: Blue {b_state.score} | Red {r_state.score}",
+            f"Units: Blue {blue_units} | Red {red_units}",
+            f"Bases HP: Blue {b_state.base.hp} | Red {r_state.base.hp}",
+            "",
+        ]
+        out.extend(" ".join(row) for row in grid)
+        out.append("")
         if events:
-            print("Recent events:")
-            for line in events[-5:]:
-                print(f"- {line}")
+            out.append("Recent events:")
+            out.extend(f"- {line}" for line in events[-5:])
+        sys.stdout.write((CLEAR_SCREEN if self.clear_screen else "") + "\n".join(out) + "\n")
         if self.log_to_file:
             self._write_events(events)
 
     def _write_events(self, events: List[str]) -> None:
-        with open(self.log_file_path, "a", encoding="utf-8") as f:
-            for e in events:
-                f.write(e + "\n")
+        if self._log_fh is None:
+            return
+        self._log_fh.writelines(e + "\n" for e in events)
+
+    def close(self) -> None:
+        """Close the log file, if one is open; safe to call more than once."""
+        if self._log_fh is not None:
+            self._log_fh.close()
+            self._log_fh = None
 
     def print_final(self, winner: str, state: GameState) -> None:
         print(f"Final result: {winner} wins!")
         print(f"Scores – Blue: {state.players['Blue'].score} | Red: {state.players['Red'].score}")
+        self.close()